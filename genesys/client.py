@@ -4,12 +4,22 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from socket import AF_INET, SOCK_STREAM, socket
+import asyncio
+import logging
+import warnings
+from dataclasses import dataclass, field
+from functools import partial
+from socket import AF_INET, IPPROTO_TCP, SOCK_STREAM, TCP_NODELAY, socket
+from socket import timeout as SocketTimeout
+from threading import RLock
+from typing import Any, Callable, Coroutine
 
 from serial import Serial
 
-from genesys.protocol import Protocol
+from genesys.protocol import GenesysError, Protocol
+
+_logger = logging.getLogger(__name__)
+_logger.addHandler(logging.NullHandler())
 
 
 @dataclass
@@ -18,23 +28,70 @@ class BaseClient(Protocol):
 
     address: str
     timeout: float = 1.0
+    _lock: RLock = field(default_factory=RLock, init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
         """Инициализация параметров транспорта."""
 
-        self.socket: Serial | socket
+        self.socket: Serial | socket | None
+
+    def _send(self, command: str, value: float | str | None = None) -> bytes:
+        """Послать команду в устройство."""
+
+        with self._lock:
+            return super()._send(command, value)
+
+    def send_many(self, commands: list[tuple[str, float | str | None]]) -> list[bytes]:
+        """Послать в устройство несколько команд за один обмен."""
+
+        with self._lock:
+            return super().send_many(commands)
+
+    def __enter__(self) -> BaseClient:
+        """Вход в контекст работы с устройством."""
+
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Закрытие соединения с устройством при выходе из контекста."""
+
+        self.close()
 
     def __del__(self) -> None:
-        """Закрытие соединения с устройством при удалении объекта."""
+        """Закрытие соединения с устройством при удалении объекта, если оно не
+        было закрыто явно.
+        """
 
-        if self.socket:
-            self.socket.close()
+        if getattr(self, "socket", None) is not None:
+            warnings.warn(f"unclosed {self!r}", ResourceWarning, source=self)
+            self.close()
+
+    def close(self) -> None:
+        """Закрытие соединения с устройством."""
+
+        with self._lock:
+            sock = getattr(self, "socket", None)
+            if sock is not None:
+                try:
+                    sock.close()
+                finally:
+                    self.socket = None
 
     def _bus_exchange(self, packet: bytes) -> bytes:
         """Обмен по интерфейсу."""
 
         raise NotImplementedError
 
+    def _bus_exchange_many(self, packet: bytes, count: int) -> list[bytes]:
+        """Обмен по интерфейсу пакетом из нескольких команд."""
+
+        raise NotImplementedError
+
+    def _bus_flush(self) -> None:
+        """Сброс буферов интерфейса."""
+
+        raise NotImplementedError
+
 
 @dataclass
 class GenesysSerialClient(BaseClient):
@@ -50,15 +107,32 @@ class GenesysSerialClient(BaseClient):
         self.socket: Serial = Serial(port=self.address, baudrate=self.baudrate,
                                      timeout=self.timeout)
 
+        # USB-serial adapters buffer incoming bytes for up to 16 ms; with the
+        # ASYNC_LOW_LATENCY flag the reply is passed on as soon as it arrives.
+        # pyserial implements this on Linux only.
+        try:
+            self.socket.set_low_latency_mode(True)
+        except (AttributeError, ValueError):
+            _logger.debug("Low latency mode is not supported by %s", self.address)
+
     def _bus_exchange(self, packet: bytes) -> bytes:
         """Обмен по интерфейсу."""
 
-        self.socket.reset_input_buffer()
-        self.socket.reset_output_buffer()
-
         self.socket.write(packet)
         return self.socket.read_until(b"\r")
 
+    def _bus_exchange_many(self, packet: bytes, count: int) -> list[bytes]:
+        """Обмен по интерфейсу пакетом из нескольких команд."""
+
+        self.socket.write(packet)
+        return [self.socket.read_until(b"\r") for _ in range(count)]
+
+    def _bus_flush(self) -> None:
+        """Сброс буферов интерфейса."""
+
+        self.socket.reset_input_buffer()
+        self.socket.reset_output_buffer()
+
 
 @dataclass
 class GenesysTcpClient(BaseClient):
@@ -68,15 +142,166 @@ class GenesysTcpClient(BaseClient):
         """Инициализация параметров транспорта."""
 
         ip, port = self.address.split(":")
-        self.socket: socket = socket(AF_INET, SOCK_STREAM)
-        self.socket.settimeout(self.timeout)
-        self.socket.connect((ip, int(port)))
+        sock = socket(AF_INET, SOCK_STREAM)
+        try:
+            sock.settimeout(self.timeout)
+            sock.connect((ip, int(port)))
+            sock.setsockopt(IPPROTO_TCP, TCP_NODELAY, 1)
+        except BaseException:
+            sock.close()
+            raise
+        self.socket: socket = sock
+
+        self._rxbuf = bytearray(4096)
+        self._rxview = memoryview(self._rxbuf)
+        self._rxpos = 0
+        self._rxlen = 0
+
+    def _rx_reserve(self) -> None:
+        """Освобождение места в конце буфера приема. Непрочитанные данные
+        переносятся в начало буфера, а если буфер заполнен целиком, он
+        увеличивается вдвое.
+        """
+
+        if self._rxpos:
+            size = self._rxlen - self._rxpos
+            self._rxbuf[:size] = self._rxview[self._rxpos:self._rxlen].tobytes()
+            self._rxpos, self._rxlen = 0, size
+        else:
+            self._rxview.release()
+            self._rxbuf.extend(bytes(len(self._rxbuf)))
+            self._rxview = memoryview(self._rxbuf)
+
+    def _tcp_read(self) -> bytes:
+        """Чтение ответа до символа CR. Данные читаются с упреждением прямо в
+        буфер приема, последующие ответы выделяются из буфера без обращения к
+        сокету. По истечении таймаута возвращаются уже полученные данные.
+        """
+
+        idx = self._rxbuf.find(b"\r", self._rxpos, self._rxlen)
+        while idx < 0:
+            if self._rxlen == len(self._rxbuf):
+                self._rx_reserve()
+            try:
+                size = self.socket.recv_into(self._rxview[self._rxlen:])
+            except SocketTimeout:
+                break
+            if not size:
+                break
+            start = self._rxlen
+            self._rxlen += size
+            idx = self._rxbuf.find(b"\r", start, self._rxlen)
+
+        end = self._rxlen if idx < 0 else idx + 1
+        frame = self._rxview[self._rxpos:end].tobytes()
+        if end == self._rxlen:
+            self._rxpos = self._rxlen = 0
+        else:
+            self._rxpos = end
+        return frame
 
     def _bus_exchange(self, packet: bytes) -> bytes:
         """Обмен по интерфейсу."""
 
         self.socket.sendall(packet)
-        return self.socket.recv(128)
+        return self._tcp_read()
+
+    def _bus_exchange_many(self, packet: bytes, count: int) -> list[bytes]:
+        """Обмен по интерфейсу пакетом из нескольких команд."""
+
+        self.socket.sendall(packet)
+        return [self._tcp_read() for _ in range(count)]
+
+    def _bus_flush(self) -> None:
+        """Сброс буферов интерфейса."""
+
+        self._rxpos = self._rxlen = 0
+        self.socket.setblocking(False)
+        try:
+            while self.socket.recv_into(self._rxview):
+                pass
+        except BlockingIOError:
+            pass
+        finally:
+            self.socket.settimeout(self.timeout)
+
+
+@dataclass
+class GenesysDevice(Protocol):
+    """Класс для работы с одним из источников питания GENESYS на общей линии
+    (multi-drop). Соединение клиента разделяется между устройствами, команда
+    ADR посылается только при смене устройства на линии.
+    """
+
+    client: BaseClient
+    address: int
+
+    def _select(self) -> None:
+        """Выбор адреса устройства на линии."""
+
+        if self.client._address != self.address:
+            self.client.select_address(self.address)
+
+    def _error(self, result: bytes) -> GenesysError:
+        """Ошибка разбора ответа. Буферы общего соединения сбрасываются
+        клиентом перед следующим обменом под его блокировкой.
+        """
+
+        return self.client._error(result)
+
+    def _send(self, command: str, value: float | str | None = None) -> bytes:
+        """Послать команду в устройство."""
+
+        with self.client._lock:
+            self._select()
+            return self.client._send(command, value)
+
+    def send_many(self, commands: list[tuple[str, float | str | None]]) -> list[bytes]:
+        """Послать в устройство несколько команд за один обмен."""
+
+        with self.client._lock:
+            self._select()
+            return self.client.send_many(commands)
+
+    def select_address(self, address: int) -> bool:
+        """Смена адреса устройства. Команда ADR будет послана при следующем
+        обмене.
+        """
+
+        self.address = address
+        return True
+
+
+@dataclass
+class AsyncGenesysClient:
+    """Асинхронная обертка над клиентом или устройством GENESYS. Методы
+    протокола выполняются в потоках, поэтому обмен с несколькими источниками
+    питания идет параллельно:
+
+        await asyncio.gather(supply1.get_voltage(), supply2.get_voltage())
+
+    Вызовы через одно соединение, в том числе через устройства GenesysDevice
+    на общей линии, выполняются по очереди под блокировкой клиента, включая
+    сброс буферов после ошибочного ответа.
+    """
+
+    client: Protocol
+
+    def __getattr__(self, name: str) -> Callable[..., Coroutine[Any, Any, Any]]:
+        """Асинхронный вариант публичного метода клиента."""
+
+        if name.startswith("_") or name == "client":
+            raise AttributeError(name)
+        method = getattr(self.client, name)
+        if not callable(method):
+            raise AttributeError(name)
+
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return await asyncio.to_thread(partial(method, *args, **kwargs))
+
+        wrapper.__doc__ = method.__doc__
+        return wrapper
 
 
-__all__ = ["GenesysSerialClient", "GenesysTcpClient"]
+__all__ = ["AsyncGenesysClient", "GenesysDevice", "GenesysSerialClient",
+           "GenesysTcpClient"]
@@ -5,13 +5,26 @@
 from __future__ import annotations
 
 import logging
-import re
-from time import sleep
-from typing import TypedDict
+from functools import lru_cache, partial
+from time import monotonic, sleep
+from typing import Callable, TypedDict, TypeVar, cast
 
 _logger = logging.getLogger(__name__)
 _logger.addHandler(logging.NullHandler())
 
+_Number = TypeVar("_Number", float, int)
+
+_FIELDS_TABLE = bytes.maketrans(b"(", b",")
+
+_REMOTE_VALUES = frozenset((b"LOC\r", b"REM\r", b"LLO\r"))
+_MODE_VALUES = frozenset((b"CV\r", b"CC\r", b"OFF\r"))
+_ON_OFF_VALUES = frozenset((b"ON\r", b"OFF\r"))
+
+_VC_DATA_FIELDS = (("MV", float), ("PV", float), ("MC", float), ("PC", float),
+                   ("OVP", float), ("UVL", float))
+_STATUS_FIELDS = (("MV", float), ("PV", float), ("MC", float), ("PC", float),
+                  ("SR", partial(int, base=16)), ("FR", partial(int, base=16)))
+
 
 class STATUS(TypedDict):
     MV: float
@@ -35,20 +48,87 @@ class GenesysError(Exception):
     pass
 
 
+@lru_cache(maxsize=256, typed=True)
+def _make_packet(command: str, value: float | str | None = None) -> bytes:
+    """Формирование пакета для записи. Результат кэшируется, поэтому пакеты
+    команд без аргументов и с повторяющимися значениями собираются один раз.
+    """
+
+    packet = bytearray(command.encode("ascii"))
+    if value is not None:
+        if type(value) is int:
+            packet += b" %d" % value
+        else:
+            packet += b" " + format(value).encode("ascii")
+    packet += b"\r"
+    return bytes(packet)
+
+
+def _parse_number(proto: Protocol, result: bytes,
+                  convert: Callable[[bytes], _Number]) -> _Number:
+    """Разбор числового ответа."""
+
+    try:
+        return convert(result[:-1])
+    except ValueError:
+        raise proto._error(result) from None
+
+
+def _parse_string(proto: Protocol, result: bytes,
+                  pattern: frozenset[bytes] | None) -> str:
+    """Разбор строкового ответа с проверкой допустимых значений."""
+
+    if pattern and result not in pattern:
+        raise proto._error(result)
+    return result.decode("ascii")
+
+
 class Protocol:
     """Класс протокола работы с программируемым источником питания GENESYS."""
 
+    _address: int | None = None
+    _ready_at: float = 0.0
+    _flush_pending: bool = False
+
     def _bus_exchange(self, packet: bytes) -> bytes:
         """Обмен по интерфейсу."""
 
         raise NotImplementedError
 
+    def _bus_exchange_many(self, packet: bytes, count: int) -> list[bytes]:
+        """Обмен по интерфейсу пакетом из нескольких команд."""
+
+        raise NotImplementedError
+
+    def _bus_flush(self) -> None:
+        """Сброс буферов интерфейса."""
+
+        raise NotImplementedError
+
+    def _wait_ready(self) -> None:
+        """Ожидание готовности устройства после смены адреса."""
+
+        if self._ready_at:
+            delay = self._ready_at - monotonic()
+            if delay > 0:
+                sleep(delay)
+            self._ready_at = 0.0
+
+    def _prepare(self) -> None:
+        """Подготовка к обмену: ожидание готовности устройства и сброс буферов
+        интерфейса после ошибочного ответа.
+        """
+
+        self._wait_ready()
+        if self._flush_pending:
+            self._flush_pending = False
+            self._bus_flush()
+
     @staticmethod
     def _make_packet(command: str, value: float | str | None = None) -> bytes:
         """Формирование пакета для записи."""
 
-        msg = "" if value is None else f" {value}"
-        return bytes(command + msg + "\r", encoding="ascii")
+        return _make_packet(command, value)
 
     def _send(self, command: str, value: float | str | None = None) -> bytes:
         """Послать команду в устройство."""
@@ -56,44 +136,86 @@ class Protocol:
         packet = self._make_packet(command.upper(), value)
         _logger.debug("Send frame = %r", packet)
 
+        self._prepare()
         answer = self._bus_exchange(packet)
         _logger.debug("Recv frame = %r", answer)
 
+        if not answer.endswith(b"\r"):
+            raise self._error(answer)
         return answer
 
+    def send_many(self, commands: list[tuple[str, float | str | None]]) -> list[bytes]:
+        """Послать в устройство несколько команд за один обмен. Ответы
+        возвращаются в порядке следования команд. Смена адреса выполняется
+        только методом select_address.
+        """
+
+        if any(command.upper() == "ADR" for command, _ in commands):
+            msg = "ADR is not allowed in send_many, use select_address"
+            raise GenesysError(msg)
+
+        packet = b"".join(self._make_packet(command.upper(), value)
+                          for command, value in commands)
+        _logger.debug("Send frame = %r", packet)
+
+        self._prepare()
+        answers = self._bus_exchange_many(packet, len(commands))
+        _logger.debug("Recv frames = %r", answers)
+
+        for answer in answers:
+            if not answer.endswith(b"\r"):
+                raise self._error(answer)
+        return answers
+
+    def _error(self, result: bytes) -> GenesysError:
+        """Ошибка разбора ответа. Перед следующим обменом буферы интерфейса
+        сбрасываются, чтобы запоздавшие остатки ответа не были приняты за ответ
+        на новую команду.
+        """
+
+        self._flush_pending = True
+        return GenesysError(result)
+
     def _set(self, command: str, value: float | None = None) -> bool:
         """Установить новое значение."""
 
         result = self._send(command=command, value=value)
         if result != b"OK\r":
-            raise GenesysError(result)
+            raise self._error(result)
         return True
 
     def _get_float(self, command: str) -> float:
         """Прочитать значение с плавающей точкой."""
 
-        result = self._send(command=command)
-        try:
-            return float(result)
-        except ValueError:
-            raise GenesysError(result) from None
+        return _parse_number(self, self._send(command=command), float)
 
     def _get_int(self, command: str) -> int:
         """Прочитать целочисленное значение."""
 
-        result = self._send(command=command)
-        try:
-            return int(result)
-        except ValueError:
-            raise GenesysError(result) from None
+        return _parse_number(self, self._send(command=command), int)
 
-    def _get_string(self, command: str, pattern: set[bytes] | None = None) -> str:
+    def _get_string(self, command: str, pattern: frozenset[bytes] | None = None) -> str:
         """Прочитать строковое значение."""
 
+        return _parse_string(self, self._send(command=command), pattern)
+
+    def _get_fields(self, command: str,
+                    schema: tuple[tuple[str, Callable[[bytes], float]], ...]) -> dict:
+        """Прочитать значения, разделенные запятыми, и преобразовать их по
+        схеме (имя, функция). Значения вида NAME(value) освобождаются от имен.
+        """
+
         result = self._send(command=command)
-        if pattern and result not in pattern:
-            raise GenesysError(result)
-        return result.decode("ascii")
+        fields = result.translate(_FIELDS_TABLE, b" )\r").split(b",")
+        if len(fields) == 2 * len(schema):
+            fields = fields[1::2]
+        if len(fields) != len(schema):
+            raise self._error(result)
+        try:
+            return {name: convert(value)
+                    for (name, convert), value in zip(schema, fields)}
+        except ValueError:
+            raise self._error(result) from None
 
     # Initialization Control Commands
 
@@ -102,8 +224,10 @@ class Protocol:
         the power supply.
         """
 
+        self._address = None
         result = self._set("ADR", address)
-        sleep(0.1)      # manual chapter 7.5.2
+        self._address = address
+        self._ready_at = monotonic() + 0.1      # manual chapter 7.5.2
         return result
 
     def clear_status(self) -> bool:
@@ -124,7 +248,7 @@ class Protocol:
     def get_remote_mode(self) -> str:
         """Return to the Remote mode setting."""
 
-        return self._get_string("RMT?", {b"LOC\r", b"REM\r", b"LLO\r"})
+        return self._get_string("RMT?", _REMOTE_VALUES)
 
     def get_multi_drop(self) -> int:
         """Return if Multi-drop option is installed. 1 indicates installed and 0
@@ -195,33 +319,17 @@ class Protocol:
     def get_operation_mode(self) -> str:
         """Return the power supply operation mode."""
 
-        return self._get_string("MODE?", {b"CV\r", b"CC\r", b"OFF\r"})
+        return self._get_string("MODE?", _MODE_VALUES)
 
     def get_voltage_and_current(self) -> VC_DATA:
         """Display Voltage and Current data."""
 
-        result = self._get_string("DVC?")
-        status = re.sub(r"[a-z() ]*", "", result.lower()).split(",")
-
-        return {"MV": float(status[0]),
-                "PV": float(status[1]),
-                "MC": float(status[2]),
-                "PC": float(status[3]),
-                "OVP": float(status[4]),
-                "UVL": float(status[5])}
+        return cast(VC_DATA, self._get_fields("DVC?", _VC_DATA_FIELDS))
 
     def get_power_status(self) -> STATUS:
         """Read the complete power supply status."""
 
-        result = self._get_string("STT?")
-        status = re.sub(r"[a-z() ]*", "", result.lower()).split(",")
-
-        return {"MV": float(status[0]),
-                "PV": float(status[1]),
-                "MC": float(status[2]),
-                "PC": float(status[3]),
-                "SR": int(status[4], 16),
-                "FR": int(status[5], 16)}
+        return cast(STATUS, self._get_fields("STT?", _STATUS_FIELDS))
 
     def set_filter(self, value: int) -> bool:
         """Set the low pass filter frequency of the A to D Converter for Voltage
@@ -243,7 +351,7 @@ class Protocol:
     def get_output(self) -> str:
         """Return the output On/Off status string."""
 
-        return self._get_string("OUT?", {b"ON\r", b"OFF\r"})
+        return self._get_string("OUT?", _ON_OFF_VALUES)
 
     def set_foldback_protection(self, value: int) -> bool:
         """Set the Foldback protection to ON or OFF."""
@@ -253,7 +361,7 @@ class Protocol:
     def get_foldback_protection(self) -> str:
         """Return the Foldback protection status string."""
 
-        return self._get_string("FLD?", {b"ON\r", b"OFF\r"})
+        return self._get_string("FLD?", _ON_OFF_VALUES)
 
     def set_foldback_delay(self, value: int) -> bool:
         """Add (value x 0.1) seconds to the Fold Back Delay. This delay is in
@@ -308,7 +416,7 @@ class Protocol:
     def get_autorestart_mode(self) -> str:
         """Return the string auto-restart mode status."""
 
-        return self._get_string("AST?", {b"ON\r", b"OFF\r"})
+        return self._get_string("AST?", _ON_OFF_VALUES)
 
     def save_settings(self) -> bool:
         """Save present settings. The settings are the same as power-down last